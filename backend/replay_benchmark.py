@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Replay recorded provider responses through the debate pipeline, offline.
+
+Record fixtures by running the server with DEBATE_RECORD_PATH=/tmp/provider_responses.jsonl,
+then replay them here with Gemini/OpenAI stubbed out:
+
+    python replay_benchmark.py /tmp/provider_responses.jsonl --iterations 5000
+
+Full-debate records drive single-call requests; outline and expand records drive
+progressive requests. Each provider call is answered with the next recorded reply of
+the kind it asks for (debate, outline or expand).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import server
+
+KINDS = ("debate", "outline", "expand")
+MODES = {"single": "debate", "progressive": "outline"}
+
+
+class ReplayProviders:
+    """Stub Gemini and OpenAI clients that answer from per-kind pools of recorded replies.
+
+    A recorded OpenAI reply means Gemini failed at record time, so the Gemini stub raises
+    and hands that reply to the OpenAI stub on the same thread (expansions run
+    concurrently, so this state is thread-local).
+    """
+
+    def __init__(self, records):
+        self.pools = {kind: [record for record in records if record.get("kind", "debate") == kind] for kind in KINDS}
+        self.positions = dict.fromkeys(KINDS, 0)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.models = self
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.openai_create))
+
+    def next_record(self, kind):
+        with self.lock:
+            pool = self.pools[kind]
+            if not pool:
+                raise RuntimeError(f"no recorded {kind} replies")
+            record = pool[self.positions[kind] % len(pool)]
+            self.positions[kind] += 1
+            return record
+
+    def generate_content(self, model, contents, config):
+        record = self.next_record(self.local.kind)
+        self.local.pending_openai = record if record["provider"] == "openai" else None
+        if record["provider"] != "gemini":
+            raise RuntimeError("replayed Gemini failure")
+        return SimpleNamespace(text=record["raw"])
+
+    def openai_create(self, **kwargs):
+        record, self.local.pending_openai = getattr(self.local, "pending_openai", None), None
+        if record is None:
+            raise RuntimeError("replayed OpenAI failure")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=record["raw"]))])
+
+
+def load_fixture(path):
+    """Load every recorded reply from a JSONL fixture"""
+    with open(path, encoding='utf-8') as fixture:
+        return [json.loads(line) for line in fixture if line.strip()]
+
+
+def install_stubs(records):
+    """Point the server at the replay stubs and count generate_json calls/failures per kind.
+
+    Returns (providers, outcomes); callers that need the real clients back (tests)
+    should save and restore the patched server attributes themselves.
+    """
+    providers = ReplayProviders(records)
+    server.DEBATE_RECORD_PATH = None
+    server.GEMINI_AVAILABLE = True
+    server.gemini_client = providers
+    server.openai_client = providers
+    # The OpenAI fallback is skipped for placeholder keys
+    os.environ['OPENAI_API_KEY'] = 'sk-replay'
+
+    outcomes = {kind: {"calls": 0, "failures": 0} for kind in KINDS}
+    outcomes_lock = threading.Lock()
+    real_generate_json = server.generate_json
+
+    def counting_generate_json(prompt, max_tokens=2000, kind="debate", topic=""):
+        providers.local.kind = kind
+        result = real_generate_json(prompt, max_tokens, kind, topic)
+        with outcomes_lock:
+            outcomes[kind]["calls"] += 1
+            outcomes[kind]["failures"] += result is None
+        return result
+
+    server.generate_json = counting_generate_json
+    return providers, outcomes
+
+
+def reset_outcomes(outcomes):
+    for counts in outcomes.values():
+        counts["calls"] = counts["failures"] = 0
+
+
+async def replay_one(progressive, topic):
+    """Run one request through the handler and serializer. Returns (stage timings, error)."""
+    root = server.new_span("request")
+    token = server.current_span.set(root)
+    error = None
+    try:
+        handler_start = time.perf_counter()
+        try:
+            response = await server.generate_debate_arguments(
+                server.DebateTopicRequest(topic=topic, progressive=progressive)
+            )
+        except Exception as e:
+            response, error = None, e
+        handler_ms = (time.perf_counter() - handler_start) * 1000
+
+        serialize_ms = 0.0
+        if response is not None:
+            serialize_start = time.perf_counter()
+            response.model_dump_json()
+            serialize_ms = (time.perf_counter() - serialize_start) * 1000
+    finally:
+        server.current_span.reset(token)
+
+    stages = {"handler": handler_ms, "serialize": serialize_ms}
+    stages.update(server.span_coverage(root))
+    return stages, error
+
+
+async def run_timing_pass(progressive, topic, iterations):
+    stage_samples, errors = {}, 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        stages, error = await replay_one(progressive, topic)
+        errors += error is not None
+        for name, duration in stages.items():
+            stage_samples.setdefault(name, []).append(duration)
+    elapsed = time.perf_counter() - start
+    return elapsed, stage_samples, errors
+
+
+async def run_allocation_pass(progressive, topic, iterations):
+    """Per-request peak traced memory, plus blocks still held after the pass"""
+    peaks = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await replay_one(progressive, topic)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    retained_blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return peaks, retained_blocks
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def benchmark_mode(mode, providers, outcomes, args):
+    """Warm up, then time and allocation-trace one request mode"""
+    progressive = mode == "progressive"
+    topic = providers.pools[MODES[mode]][0].get("topic") or "Replay topic"
+
+    for _ in range(len(providers.pools[MODES[mode]])):
+        await replay_one(progressive, topic)
+    reset_outcomes(outcomes)
+
+    elapsed, stage_samples, errors = await run_timing_pass(progressive, topic, args.iterations)
+    kinds = {
+        kind: {**counts, "failure_rate": counts["failures"] / counts["calls"]}
+        for kind, counts in outcomes.items()
+        if counts["calls"]
+    }
+
+    peaks, retained_blocks = [], 0
+    if args.alloc_iterations:
+        peaks, retained_blocks = await run_allocation_pass(progressive, topic, args.alloc_iterations)
+
+    return {
+        "iterations": args.iterations,
+        "elapsed_s": elapsed,
+        "throughput_rps": args.iterations / elapsed,
+        "errors": errors,
+        "kinds": kinds,
+        "stages_ms": {
+            name: {"mean": statistics.fmean(samples), "p95": percentile(samples, 0.95)}
+            for name, samples in stage_samples.items()
+        },
+        "alloc_peak_kib_mean": statistics.fmean(peaks) / 1024 if peaks else None,
+        "alloc_samples": len(peaks),
+        "alloc_retained_blocks": retained_blocks,
+    }
+
+
+def print_mode(mode, results):
+    print(f"\n=== {mode} ===")
+    print(f"Iterations: {results['iterations']} in {results['elapsed_s']:.2f}s ({results['throughput_rps']:.1f} req/s), handler errors: {results['errors']}")
+    for kind, counts in results["kinds"].items():
+        print(f"{kind:<8} parse failures: {counts['failures']}/{counts['calls']} ({counts['failure_rate']:.1%})")
+    print("--- Per-stage cost (ms) ---")
+    for name, stats in results["stages_ms"].items():
+        print(f"{name:<10} mean {stats['mean']:.3f}  p95 {stats['p95']:.3f}")
+    if results["alloc_samples"]:
+        print("--- Allocations (tracemalloc) ---")
+        print(f"Peak per request: {results['alloc_peak_kib_mean']:.1f} KiB (mean of {results['alloc_samples']})")
+        print(f"Blocks retained after pass: {results['alloc_retained_blocks']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline replay benchmark for /api/generate-debate")
+    parser.add_argument("fixture", help="JSONL fixture recorded with DEBATE_RECORD_PATH")
+    parser.add_argument("--mode", choices=["single", "progressive", "both"], default="both")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--alloc-iterations", type=int, default=200, help="requests traced with tracemalloc (0 to skip)")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--min-throughput", type=float, help="fail if requests/sec falls below this (per mode)")
+    parser.add_argument("--max-parse-failure-rate", type=float, help="fail if any kind's parse-failure rate exceeds this (0-1)")
+    args = parser.parse_args()
+
+    records = load_fixture(args.fixture)
+    # Parse failures are expected in the fixture; keep the per-request warnings out of the report
+    logging.getLogger(server.__name__).setLevel(logging.ERROR)
+    providers, outcomes = install_stubs(records)
+
+    modes = ["single", "progressive"] if args.mode == "both" else [args.mode]
+    results = {"records": {kind: len(pool) for kind, pool in providers.pools.items()}, "modes": {}}
+    print("=== Debate Pipeline Replay Benchmark ===")
+    print("Records: " + ", ".join(f"{count} {kind}" for kind, count in results["records"].items()))
+
+    for mode in modes:
+        if not providers.pools[MODES[mode]]:
+            print(f"\n=== {mode} === skipped: no {MODES[mode]} records")
+            continue
+        results["modes"][mode] = await benchmark_mode(mode, providers, outcomes, args)
+        print_mode(mode, results["modes"][mode])
+
+    if not results["modes"]:
+        print(f"❌ No replayable records in {args.fixture}")
+        return 1
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2)
+
+    failed = False
+    for mode, mode_results in results["modes"].items():
+        if args.min_throughput is not None and mode_results["throughput_rps"] < args.min_throughput:
+            print(f"❌ {mode} throughput {mode_results['throughput_rps']:.1f} req/s is below {args.min_throughput}")
+            failed = True
+        for kind, counts in mode_results["kinds"].items():
+            if args.max_parse_failure_rate is not None and counts["failure_rate"] > args.max_parse_failure_rate:
+                print(f"❌ {mode} {kind} parse-failure rate {counts['failure_rate']:.1%} exceeds {args.max_parse_failure_rate:.1%}")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
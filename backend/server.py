@@ -1,15 +1,50 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+def span_coverage(root: dict) -> dict:
+    """Wall-clock milliseconds covered by each span name under `root`.
+
+    Concurrent spans with the same name (e.g. parallel expansions) are merged as a union
+    of intervals rather than summed, so no value exceeds the request total.
+    """
+    intervals = {}
+
+    def collect(span: dict):
+        for child in span["children"]:
+            if child["duration_ms"] is not None:
+                intervals.setdefault(child["name"], []).append(
+                    (child["start"], child["start"] + child["duration_ms"] / 1000)
+                )
+            collect(child)
+
+    collect(root)
+    return {name: covered_ms(spans) for name, spans in intervals.items()}
+
+def server_timing_header(root: dict) -> str:
+    """Server-Timing header value with the wall-clock time covered by each span name"""
+    metrics = [f"{name};dur={duration:.1f}" for name, duration in span_coverage(root).items()]
+    metrics.append(f"total;dur={root['duration_ms']:.1f}")
+    return ", ".join(metrics)
+
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
 import os
 import logging
 import json
+import asyncio
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from openai import OpenAI
 
 # Try to import Gemini, but make it optional
@@ -25,10 +60,113 @@ ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
+def parse_write_concern(value: str):
+    """MONGO_WRITE_CONCERN_W is either a node count or a tag such as majority"""
+    return int(value) if value.isdigit() else value
+
+# Optional client tuning: an option is only passed when its env var is set, so anything
+# already in MONGO_URL (or the server default) applies otherwise
+MONGO_CLIENT_OPTIONS = {
+    'MONGO_MAX_POOL_SIZE': ('maxPoolSize', int),
+    'MONGO_MIN_POOL_SIZE': ('minPoolSize', int),
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': ('serverSelectionTimeoutMS', int),
+    'MONGO_CONNECT_TIMEOUT_MS': ('connectTimeoutMS', int),
+    'MONGO_SOCKET_TIMEOUT_MS': ('socketTimeoutMS', int),
+    'MONGO_WRITE_CONCERN_W': ('w', parse_write_concern),
+    'MONGO_WRITE_CONCERN_JOURNAL': ('journal', lambda value: value.lower() == 'true'),
+}
+
+def mongo_client_kwargs(environ) -> dict:
+    return {
+        option: convert(environ[env_var])
+        for env_var, (option, convert) in MONGO_CLIENT_OPTIONS.items()
+        if environ.get(env_var)
+    }
+
 mongo_url = os.environ['MONGO_URL']
-mongo_client = AsyncIOMotorClient(mongo_url)
+mongo_client = AsyncIOMotorClient(mongo_url, **mongo_client_kwargs(os.environ))
 db = mongo_client[os.environ['DB_NAME']]
 
+# Raw status-check heartbeats expire after this many seconds (TTL index)
+STATUS_CHECK_TTL_SECONDS = int(os.environ.get('STATUS_CHECK_TTL_SECONDS', str(7 * 24 * 3600)))
+
+# Per-client heartbeat rollups: minute buckets answer short windows, hour buckets long ones
+STATUS_ROLLUP_MINUTE_TTL_SECONDS = int(os.environ.get('STATUS_ROLLUP_MINUTE_TTL_SECONDS', str(2 * 24 * 3600)))
+STATUS_ROLLUP_HOUR_TTL_SECONDS = int(os.environ.get('STATUS_ROLLUP_HOUR_TTL_SECONDS', str(90 * 24 * 3600)))
+# Headroom between a summary window and bucket expiry (TTL monitor lag, clock skew)
+STATUS_ROLLUP_TTL_MARGIN_SECONDS = 600
+# Longest summary window whose hour buckets are all still kept. Minute buckets are only
+# read for the partial first and current hour, so their TTL just needs to exceed ~2 hours.
+MAX_SUMMARY_WINDOW_MINUTES = (STATUS_ROLLUP_HOUR_TTL_SECONDS - STATUS_ROLLUP_TTL_MARGIN_SECONDS) // 60
+
+# Indexes created idempotently at startup, keyed by collection name. Each one backs a
+# query in HOT_QUERIES (or a TTL); test_mongo_indexes.py checks they are used.
+MONGO_INDEXES = {
+    "status_checks": [
+        IndexModel([("timestamp", DESCENDING)], name="timestamp_ttl", expireAfterSeconds=STATUS_CHECK_TTL_SECONDS),
+    ],
+    "status_rollups_minute": [
+        IndexModel([("client_name", ASCENDING), ("bucket_start", ASCENDING)], name="client_name_bucket_unique", unique=True),
+        IndexModel([("bucket_start", ASCENDING)], name="bucket_start_ttl", expireAfterSeconds=STATUS_ROLLUP_MINUTE_TTL_SECONDS),
+    ],
+    "status_rollups_hour": [
+        IndexModel([("client_name", ASCENDING), ("bucket_start", ASCENDING)], name="client_name_bucket_unique", unique=True),
+        IndexModel([("bucket_start", ASCENDING)], name="bucket_start_ttl", expireAfterSeconds=STATUS_ROLLUP_HOUR_TTL_SECONDS),
+    ],
+}
+
+def index_key(key) -> list:
+    return [(field, int(direction) if isinstance(direction, float) else direction) for field, direction in key]
+
+async def ensure_index(collection, index: IndexModel):
+    """Create one declared index, reconciling an existing index on the same keys.
+
+    An index with the same keys under another name is reused (its TTL is updated via
+    collMod); a uniqueness mismatch cannot be fixed in place and is raised.
+    """
+    spec = index.document
+    name, key = spec["name"], index_key(spec["key"].items())
+    expire_after = spec.get("expireAfterSeconds")
+    existing = await collection.index_information()
+
+    for existing_name, info in existing.items():
+        if existing_name == name or index_key(info["key"]) != key:
+            continue
+        if bool(info.get("unique")) != bool(spec.get("unique")):
+            raise ValueError(f"index {existing_name} has the same keys but unique={bool(info.get('unique'))}; drop it so {name} can be created")
+        if info.get("expireAfterSeconds") != expire_after:
+            if expire_after is None:
+                raise ValueError(f"index {existing_name} has the same keys but a TTL; drop it so {name} can be created")
+            await db.command("collMod", collection.name, index={"name": existing_name, "expireAfterSeconds": expire_after})
+        logger.info(f"Reusing index {existing_name} on {collection.name} in place of {name}")
+        return
+
+    try:
+        await collection.create_indexes([index])
+    except OperationFailure as e:
+        # IndexOptionsConflict on our own index: same name and keys, different TTL
+        if e.code == 85 and expire_after is not None and name in existing:
+            await db.command("collMod", collection.name, index={"name": name, "expireAfterSeconds": expire_after})
+        else:
+            raise
+
+async def ensure_indexes() -> list:
+    """Create every declared index. Safe to run on each startup.
+
+    Each index is attempted independently so one conflict does not leave later
+    collections unindexed. Returns the (collection, index name) pairs that failed.
+    """
+    failures = []
+    for collection_name, indexes in MONGO_INDEXES.items():
+        collection = db[collection_name]
+        for index in indexes:
+            try:
+                await ensure_index(collection, index)
+            except Exception as e:
+                logger.error(f"Could not create index {index.document['name']} on {collection_name}: {str(e)}")
+                failures.append((collection_name, index.document["name"]))
+    return failures
+
 # OpenAI client
 openai_client = OpenAI(api_key=os.environ['OPENAI_API_KEY'])
 
@@ -38,6 +176,108 @@ if GEMINI_AVAILABLE:
 else:
     gemini_client = None
 
+# Progressive debate generation: max concurrent supporting-fact expansions per request.
+# The outline asks for 3-4 points per side, so 8 lets every expansion run in one wave.
+DEBATE_EXPANSION_CONCURRENCY = int(os.environ.get('DEBATE_EXPANSION_CONCURRENCY', '8'))
+# Extra attempts per failed expansion before falling back to single-call generation
+DEBATE_EXPANSION_RETRIES = int(os.environ.get('DEBATE_EXPANSION_RETRIES', '1'))
+
+# Record mode: append every raw provider reply (including malformed ones) to this JSONL fixture
+DEBATE_RECORD_PATH = os.environ.get('DEBATE_RECORD_PATH')
+record_lock = threading.Lock()
+
+# Blocking provider calls run on their own pool rather than asyncio's shared default executor
+PROVIDER_EXECUTOR_THREADS = int(os.environ.get('PROVIDER_EXECUTOR_THREADS', '64'))
+provider_executor = ThreadPoolExecutor(max_workers=PROVIDER_EXECUTOR_THREADS, thread_name_prefix='provider')
+
+DEBATE_SYSTEM_INSTRUCTION = 'You are a knowledgeable debate coach who provides balanced, well-researched arguments for any topic. Always respond with valid JSON only.'
+
+# Request tracing: slow requests (sampled) are logged with their span tree
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '2000'))
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', '1.0'))
+SLOW_REQUEST_COLLECTION_BYTES = int(os.environ.get('SLOW_REQUEST_COLLECTION_BYTES', str(50 * 1024 * 1024)))
+# Bounds on slow-request logging while MongoDB is slow or down: writes in flight, and how long each may wait
+SLOW_REQUEST_MAX_PENDING_WRITES = int(os.environ.get('SLOW_REQUEST_MAX_PENDING_WRITES', '100'))
+SLOW_REQUEST_WRITE_TIMEOUT_S = float(os.environ.get('SLOW_REQUEST_WRITE_TIMEOUT_S', '2'))
+
+# Incoming X-Request-ID values are echoed into logs, headers and Mongo, so only short safe ids are kept
+REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9-]{1,64}')
+
+def request_id_from_header(value: Optional[str]) -> str:
+    """Use the client's X-Request-ID if it is well-formed, otherwise generate a new one"""
+    if value and REQUEST_ID_PATTERN.fullmatch(value):
+        return value
+    return uuid.uuid4().hex
+
+current_request_id: ContextVar[str] = ContextVar('current_request_id', default='-')
+current_span: ContextVar[Optional[dict]] = ContextVar('current_span', default=None)
+
+def new_span(name: str) -> dict:
+    return {"name": name, "start": time.perf_counter(), "duration_ms": None, "children": []}
+
+@contextmanager
+def trace_span(name: str):
+    """Record a timed child span under the current span. No-op outside a traced request."""
+    parent = current_span.get()
+    if parent is None:
+        yield
+        return
+
+    span = new_span(name)
+    parent["children"].append(span)
+    token = current_span.set(span)
+    try:
+        yield
+    finally:
+        span["duration_ms"] = round((time.perf_counter() - span["start"]) * 1000, 2)
+        current_span.reset(token)
+
+def span_tree(span: dict, origin: float) -> dict:
+    """Convert a span to a serializable tree with offsets relative to the request start"""
+    return {
+        "name": span["name"],
+        "offset_ms": round((span["start"] - origin) * 1000, 2),
+        "duration_ms": span["duration_ms"],
+        "children": [span_tree(child, origin) for child in span["children"]]
+    }
+
+def covered_ms(intervals: list) -> float:
+    """Wall-clock milliseconds covered by the union of (start, end) intervals"""
+    total, covered_until = 0.0, None
+    for start, end in sorted(intervals):
+        if covered_until is not None and start < covered_until:
+            start = covered_until
+        if end > start:
+            total += end - start
+            covered_until = end
+    return total * 1000
+
+def server_timing_header(root: dict) -> str:
+    """Server-Timing header value with the wall-clock time covered by each span name.
+
+    Concurrent spans with the same name (e.g. parallel expansions) are merged as a union
+    of intervals rather than summed, so no metric exceeds the request total.
+    """
+    intervals = {}
+
+    def collect(span: dict):
+        for child in span["children"]:
+            if child["duration_ms"] is not None:
+                intervals.setdefault(child["name"], []).append(
+                    (child["start"], child["start"] + child["duration_ms"] / 1000)
+                )
+            collect(child)
+
+    collect(root)
+    metrics = [f"{name};dur={covered_ms(spans):.1f}" for name, spans in intervals.items()]
+    metrics.append(f"total;dur={root['duration_ms']:.1f}")
+    return ", ".join(metrics)
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = current_request_id.get()
+        return True
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -54,8 +294,19 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+class StatusClientSummary(BaseModel):
+    client_name: str
+    count: int
+    last_seen: Optional[datetime] = None
+
+class StatusSummary(BaseModel):
+    window_minutes: int
+    since: datetime
+    clients: List[StatusClientSummary]
+
 class DebateTopicRequest(BaseModel):
     topic: str
+    progressive: bool = False
 
 class Argument(BaseModel):
     point: str
@@ -84,14 +335,173 @@ async def root():
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    with trace_span("db"):
+        _ = await db.status_checks.insert_one(status_obj.dict())
+        await update_status_rollups(status_obj)
     return status_obj
 
+# Shared by the handlers and HOT_QUERIES so the explain check covers the real queries
+RECENT_STATUS_CHECKS_SORT = [("timestamp", DESCENDING)]
+LATEST_BUCKET_SORT = [("bucket_start", DESCENDING)]
+
+def rollup_bucket_filter(client_name: str, bucket_start: datetime) -> dict:
+    return {"client_name": client_name, "bucket_start": bucket_start}
+
+def latest_bucket_filter(client_name: str) -> dict:
+    return {"client_name": client_name}
+
+def bucket_range_match(ranges: list) -> dict:
+    """$match for buckets starting in any of the [start, end) ranges (end None = open)"""
+    clauses = [
+        {"bucket_start": {"$gte": start, "$lt": end} if end else {"$gte": start}}
+        for start, end in ranges
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+def rollup_summary_pipeline(match: dict) -> list:
+    return [
+        {"$match": match},
+        {"$group": {"_id": "$client_name", "count": {"$sum": "$count"}, "last_seen": {"$max": "$last_seen"}}}
+    ]
+
+def client_summary_pipeline(match: dict) -> list:
+    return [
+        {"$match": match},
+        {"$group": {"_id": None, "count": {"$sum": "$count"}, "last_seen": {"$max": "$last_seen"}}}
+    ]
+
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+    with trace_span("db"):
+        status_checks = await db.status_checks.find().sort(RECENT_STATUS_CHECKS_SORT).to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+def rollup_bucket_starts(timestamp: datetime) -> dict:
+    """Start of the minute and hour buckets a heartbeat at `timestamp` belongs to"""
+    return {
+        "minute": timestamp.replace(second=0, microsecond=0),
+        "hour": timestamp.replace(minute=0, second=0, microsecond=0),
+    }
+
+def rollup_window_ranges(window_minutes: int, now: datetime):
+    """Split a window into bucket ranges to read: (since, {"minute": [...], "hour": [...]}).
+
+    The window covers the current minute plus the previous window_minutes - 1, so it is
+    exact at minute resolution. Whole hours inside it come from hour buckets; minute
+    buckets are only read for the partial first hour and the current hour, which keeps a
+    query to at most ~120 minute buckets plus one bucket per hour, per client.
+    """
+    since = rollup_bucket_starts(now - timedelta(minutes=window_minutes - 1))["minute"]
+    current_hour = rollup_bucket_starts(now)["hour"]
+    first_full_hour = rollup_bucket_starts(since)["hour"]
+    if first_full_hour < since:
+        first_full_hour += timedelta(hours=1)
+
+    if first_full_hour >= current_hour:
+        return since, {"minute": [(since, None)], "hour": []}
+
+    minute_ranges = [(since, first_full_hour)] if since < first_full_hour else []
+    minute_ranges.append((current_hour, None))
+    return since, {"minute": minute_ranges, "hour": [(first_full_hour, current_hour)]}
+
+def rollup_collection(granularity: str):
+    return db.status_rollups_minute if granularity == "minute" else db.status_rollups_hour
+
+async def aggregate_rollups(ranges: dict, pipeline_for) -> list:
+    """Run a rollup pipeline on each granularity that has ranges and concatenate the rows"""
+    queries = [
+        rollup_collection(granularity).aggregate(pipeline_for(bucket_range_match(granularity_ranges))).to_list(None)
+        for granularity, granularity_ranges in ranges.items()
+        if granularity_ranges
+    ]
+    return [row for rows in await asyncio.gather(*queries) for row in rows]
+
+def merge_rollup_rows(rows: list) -> dict:
+    """Combine minute and hour rows that share a group key"""
+    merged = {}
+    for row in rows:
+        total = merged.setdefault(row["_id"], {"count": 0, "last_seen": None})
+        total["count"] += row["count"]
+        if row["last_seen"] is not None and (total["last_seen"] is None or row["last_seen"] > total["last_seen"]):
+            total["last_seen"] = row["last_seen"]
+    return merged
+
+async def update_status_rollups(status_obj: StatusCheck):
+    """Increment the client's minute and hour buckets for one heartbeat.
+
+    The raw heartbeat is already stored, so failures are logged rather than raised: a
+    500 here would make clients retry and double-count the heartbeat.
+    """
+    timestamp = status_obj.timestamp
+    bucket_starts = rollup_bucket_starts(timestamp)
+    buckets = [
+        (db.status_rollups_minute, bucket_starts["minute"]),
+        (db.status_rollups_hour, bucket_starts["hour"]),
+    ]
+    results = await asyncio.gather(*[
+        collection.update_one(
+            rollup_bucket_filter(status_obj.client_name, bucket_start),
+            {"$inc": {"count": 1}, "$max": {"last_seen": timestamp}},
+            upsert=True
+        )
+        for collection, bucket_start in buckets
+    ], return_exceptions=True)
+
+    for (collection, bucket_start), result in zip(buckets, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to update {collection.name} bucket {bucket_start.isoformat()} for status check {status_obj.id}: {str(result)}")
+
+@api_router.get("/status/summary", response_model=StatusSummary)
+async def get_status_summary(window_minutes: int = Query(60, ge=1, le=MAX_SUMMARY_WINDOW_MINUTES)):
+    """Heartbeat counts and last-seen per client over a window, read from rollup buckets"""
+    since, ranges = rollup_window_ranges(window_minutes, datetime.utcnow())
+    with trace_span("db"):
+        rows = await aggregate_rollups(ranges, rollup_summary_pipeline)
+
+    clients = merge_rollup_rows(rows)
+    return StatusSummary(
+        window_minutes=window_minutes,
+        since=since,
+        clients=[
+            StatusClientSummary(client_name=client_name, count=total["count"], last_seen=total["last_seen"])
+            for client_name, total in sorted(clients.items())
+        ]
+    )
+
+@api_router.get("/status/summary/{client_name}", response_model=StatusClientSummary)
+async def get_client_status_summary(client_name: str, window_minutes: int = Query(60, ge=1, le=MAX_SUMMARY_WINDOW_MINUTES)):
+    """Heartbeat count over a window and last-seen time for a single client"""
+    since, ranges = rollup_window_ranges(window_minutes, datetime.utcnow())
+    with trace_span("db"):
+        rows = await aggregate_rollups(
+            ranges, lambda match: client_summary_pipeline({"client_name": client_name, **match})
+        )
+        total = merge_rollup_rows(rows).get(None, {"count": 0, "last_seen": None})
+        if total["last_seen"] is None:
+            latest = await db.status_rollups_hour.find_one(
+                latest_bucket_filter(client_name), {"_id": 0, "last_seen": 1}, sort=LATEST_BUCKET_SORT
+            )
+            total["last_seen"] = latest["last_seen"] if latest else None
+
+    return StatusClientSummary(client_name=client_name, count=total["count"], last_seen=total["last_seen"])
+
+# Every query the status handlers run, with sample arguments; test_mongo_indexes.py
+# explains each one (finds and aggregations) and fails on a COLLSCAN
+# A 3h window at 12:30 reads minute buckets for 09:31-10:00 and 12:00-now, hour buckets for 10:00-12:00
+_, HOT_QUERY_RANGES = rollup_window_ranges(180, datetime(2024, 1, 2, 12, 30))
+HOT_QUERIES = [
+    {"collection": "status_checks", "find": {}, "sort": RECENT_STATUS_CHECKS_SORT},
+    {"collection": "status_rollups_hour", "find": latest_bucket_filter("example"), "sort": LATEST_BUCKET_SORT},
+] + [
+    query
+    for granularity, ranges in HOT_QUERY_RANGES.items()
+    for query in (
+        {"collection": f"status_rollups_{granularity}", "find": rollup_bucket_filter("example", ranges[0][0])},
+        {"collection": f"status_rollups_{granularity}", "aggregate": rollup_summary_pipeline(bucket_range_match(ranges))},
+        {"collection": f"status_rollups_{granularity}", "aggregate": client_summary_pipeline({"client_name": "example", **bucket_range_match(ranges)})},
+    )
+]
+
 def generate_mock_debate_arguments(topic: str) -> dict:
     """Generate mock debate arguments for demo purposes"""
     # Create topic-specific arguments or use generic ones
@@ -209,17 +619,9 @@ def generate_mock_debate_arguments(topic: str) -> dict:
         ]
     }
 
-@api_router.post("/generate-debate", response_model=DebateResponse)
-async def generate_debate_arguments(request: DebateTopicRequest):
-    try:
-        # Try Gemini first, fallback to OpenAI, then mock data
-        parsed_response = None
-
-        if GEMINI_AVAILABLE and gemini_client:
-            try:
-                # Use Gemini API
-                prompt = f"""
-                Generate balanced debate arguments for the topic: "{request.topic}"
+def build_debate_prompt(topic: str) -> str:
+    return f"""
+                Generate balanced debate arguments for the topic: "{topic}"
 
                 Please provide:
                 1. 3-4 strong arguments FOR the topic with supporting facts
@@ -244,72 +646,234 @@ async def generate_debate_arguments(request: DebateTopicRequest):
                 Ensure arguments are well-researched, factual, and present both sides fairly.
                 """
 
+def build_outline_prompt(topic: str) -> str:
+    return f"""
+                Outline balanced debate arguments for the topic: "{topic}"
+
+                Please provide:
+                1. 3-4 strong argument points FOR the topic
+                2. 3-4 strong argument points AGAINST the topic
+
+                Only list the points, no supporting facts. Format the response as JSON with this structure:
+                {{
+                    "arguments_for": ["Main argument point"],
+                    "arguments_against": ["Main argument point"]
+                }}
+                """
+
+def build_expansion_prompt(topic: str, side: str, point: str) -> str:
+    return f"""
+                For the debate topic: "{topic}"
+
+                Provide 3 concise, well-researched supporting facts for this argument {side} the topic:
+                "{point}"
+
+                Format the response as JSON with this structure:
+                {{
+                    "supporting_facts": ["Fact 1", "Fact 2", "Fact 3"]
+                }}
+                """
+
+def parse_json_response(ai_response: str) -> dict:
+    """Parse a provider's JSON reply, tolerating markdown fences and surrounding text"""
+    # Clean up markdown code blocks if present
+    clean_response = ai_response.strip()
+    if clean_response.startswith('```json'):
+        clean_response = clean_response.replace('```json', '').replace('```', '').strip()
+    elif clean_response.startswith('```'):
+        clean_response = clean_response.replace('```', '').strip()
+
+    # Try to extract JSON from the text if it's not perfect
+    if not clean_response.startswith('{'):
+        # Find the first { and last } to extract JSON
+        start_idx = clean_response.find('{')
+        end_idx = clean_response.rfind('}')
+        if start_idx != -1 and end_idx != -1:
+            clean_response = clean_response[start_idx:end_idx+1]
+
+    return json.loads(clean_response)
+
+def record_provider_response(provider: str, kind: str, topic: str, raw: Optional[str]):
+    """Append a raw provider reply to the record fixture, for offline replay benchmarks"""
+    if not DEBATE_RECORD_PATH:
+        return
+    line = json.dumps({
+        "provider": provider,
+        "kind": kind,
+        "topic": topic,
+        "raw": raw,
+        "recorded_at": datetime.utcnow().isoformat()
+    })
+    # Recording must never change which provider answers, so write errors are only logged
+    try:
+        with record_lock:
+            with open(DEBATE_RECORD_PATH, 'a', encoding='utf-8') as fixture:
+                fixture.write(line + '\n')
+    except OSError as e:
+        logger.warning(f"Failed to record {provider} response to {DEBATE_RECORD_PATH}: {str(e)}")
+
+def is_debate_argument(argument) -> bool:
+    return (
+        isinstance(argument, dict)
+        and isinstance(argument.get("point"), str)
+        and isinstance(argument.get("supporting_facts"), list)
+    )
+
+def has_expected_shape(kind: str, parsed) -> bool:
+    """Whether a parsed reply can be used for this kind of call (debate, outline or expand)"""
+    if not isinstance(parsed, dict):
+        return False
+    if kind != "debate":
+        return True
+    return all(
+        isinstance(parsed.get(side), list) and all(is_debate_argument(arg) for arg in parsed[side])
+        for side in ("arguments_for", "arguments_against")
+    )
+
+def parse_reply(kind: str, text: str) -> dict:
+    """Parse a provider reply, raising ValueError if it lacks the expected shape"""
+    parsed = parse_json_response(text)
+    if not has_expected_shape(kind, parsed):
+        raise ValueError(f"Unexpected {kind} reply shape: {type(parsed).__name__}")
+    return parsed
+
+def generate_json(prompt: str, max_tokens: int = 2000, kind: str = "debate", topic: str = "") -> Optional[dict]:
+    """Run a JSON prompt against Gemini, falling back to OpenAI. Returns None if both fail.
+
+    A reply that parses but does not have the shape `kind` needs counts as a failed attempt.
+    """
+    if GEMINI_AVAILABLE and gemini_client:
+        try:
+            with trace_span("gemini"):
                 response = gemini_client.models.generate_content(
                     model='gemini-2.0-flash-001',
                     contents=prompt,
                     config={
-                        'system_instruction': 'You are a knowledgeable debate coach who provides balanced, well-researched arguments for any topic. Always respond with valid JSON only.',
+                        'system_instruction': DEBATE_SYSTEM_INSTRUCTION,
                         'temperature': 0.7,
-                        'max_output_tokens': 2000
+                        'max_output_tokens': max_tokens
                     }
                 )
+            record_provider_response("gemini", kind, topic, response.text)
+            with trace_span("parse"):
+                return parse_reply(kind, response.text)
+        except Exception as gemini_error:
+            logger.warning(f"Gemini API failed: {str(gemini_error)}, trying OpenAI...")
+
+    if not os.environ.get('OPENAI_API_KEY', '').startswith('sk-placeholder'):
+        try:
+            with trace_span("openai"):
+                response = openai_client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": DEBATE_SYSTEM_INSTRUCTION},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=max_tokens
+                )
+            record_provider_response("openai", kind, topic, response.choices[0].message.content)
+            with trace_span("parse"):
+                parsed = json.loads(response.choices[0].message.content)
+                if not has_expected_shape(kind, parsed):
+                    raise ValueError(f"Unexpected {kind} reply shape: {type(parsed).__name__}")
+                return parsed
+        except Exception as openai_error:
+            logger.warning(f"OpenAI API also failed: {str(openai_error)}")
+
+    return None
+
+def outline_points(outline, side: str) -> List[str]:
+    """Non-empty string points for one side of an outline reply, or [] if malformed"""
+    points = outline.get(side) if isinstance(outline, dict) else None
+    if not isinstance(points, list):
+        return []
+    return [point.strip() for point in points if isinstance(point, str) and point.strip()]
+
+def expansion_facts(expansion) -> Optional[List[str]]:
+    """Supporting facts from an expansion reply, or None if it is unusable"""
+    facts = expansion.get("supporting_facts") if isinstance(expansion, dict) else None
+    if not isinstance(facts, list):
+        return None
+    facts = [fact.strip() for fact in facts if isinstance(fact, str) and fact.strip()]
+    return facts or None
+
+async def run_provider_call(func, *args):
+    """Run a blocking provider call on the provider pool, keeping the trace context"""
+    context = copy_context()
+    return await asyncio.get_running_loop().run_in_executor(provider_executor, context.run, func, *args)
+
+async def generate_progressive_debate(topic: str) -> Optional[dict]:
+    """Two-phase generation: a short outline call, then concurrent per-argument fact expansion.
+
+    Wall-clock time is roughly the outline call plus the slowest expansion, instead of one
+    long completion that emits every point and fact serially. Returns None (so the caller
+    falls back to single-call generation) if the outline is empty or incomplete, or if any
+    expansion still fails after DEBATE_EXPANSION_RETRIES retries.
+    """
+    with trace_span("outline"):
+        outline = await run_provider_call(generate_json, build_outline_prompt(topic), 500, "outline", topic)
+
+    points_for = outline_points(outline, "arguments_for")
+    points_against = outline_points(outline, "arguments_against")
+    if not points_for or not points_against:
+        logger.warning(f"Progressive outline incomplete ({len(points_for)} FOR, {len(points_against)} AGAINST points)")
+        return None
+
+    semaphore = asyncio.Semaphore(DEBATE_EXPANSION_CONCURRENCY)
+
+    async def expand(side: str, point: str) -> Optional[dict]:
+        for attempt in range(1 + DEBATE_EXPANSION_RETRIES):
+            async with semaphore:
+                with trace_span("expand"):
+                    expansion = await run_provider_call(
+                        generate_json, build_expansion_prompt(topic, side, point), 400, "expand", topic
+                    )
+            facts = expansion_facts(expansion)
+            if facts is not None:
+                return {"point": point, "supporting_facts": facts}
+            logger.warning(f"Expansion attempt {attempt + 1} failed for {side} argument: {point}")
+        return None
+
+    expanded = await asyncio.gather(
+        *[expand("FOR", point) for point in points_for],
+        *[expand("AGAINST", point) for point in points_against]
+    )
+    if any(argument is None for argument in expanded):
+        logger.warning("Progressive expansion incomplete, falling back to single-call generation")
+        return None
+
+    logger.info(f"Progressive generation expanded {len(points_for)} FOR and {len(points_against)} AGAINST arguments")
+    return {
+        "arguments_for": expanded[:len(points_for)],
+        "arguments_against": expanded[len(points_for):]
+    }
 
-                ai_response = response.text
-
-                # Clean up markdown code blocks if present
-                clean_response = ai_response.strip()
-                if clean_response.startswith('```json'):
-                    clean_response = clean_response.replace('```json', '').replace('```', '').strip()
-                elif clean_response.startswith('```'):
-                    clean_response = clean_response.replace('```', '').strip()
-
-                # Try to extract JSON from the text if it's not perfect
-                if not clean_response.startswith('{'):
-                    # Find the first { and last } to extract JSON
-                    start_idx = clean_response.find('{')
-                    end_idx = clean_response.rfind('}')
-                    if start_idx != -1 and end_idx != -1:
-                        clean_response = clean_response[start_idx:end_idx+1]
-
-                parsed_response = json.loads(clean_response)
-                logger.info(f"Successfully parsed Gemini response with {len(parsed_response.get('arguments_for', []))} FOR and {len(parsed_response.get('arguments_against', []))} AGAINST arguments")
-
-            except Exception as gemini_error:
-                logger.warning(f"Gemini API failed: {str(gemini_error)}, trying OpenAI...")
-                parsed_response = None
-        else:
-            # Gemini not available, skip to OpenAI
-            parsed_response = None
-
-        # Fallback to OpenAI if Gemini failed or not available
+@api_router.post("/generate-debate", response_model=DebateResponse)
+async def generate_debate_arguments(request: DebateTopicRequest):
+    try:
+        # Try Gemini first, fallback to OpenAI, then mock data
+        parsed_response = None
+        if request.progressive:
+            parsed_response = await generate_progressive_debate(request.topic)
         if parsed_response is None:
-            if not os.environ.get('OPENAI_API_KEY', '').startswith('sk-placeholder'):
-                try:
-                    response = openai_client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[
-                            {"role": "system", "content": "You are a knowledgeable debate coach who provides balanced, well-researched arguments for any topic. Always respond with valid JSON only."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.7,
-                        max_tokens=2000
-                    )
+            parsed_response = await run_provider_call(generate_json, build_debate_prompt(request.topic), 2000, "debate", request.topic)
 
-                    ai_response = response.choices[0].message.content
-                    parsed_response = json.loads(ai_response)
-                except Exception as openai_error:
-                    logger.warning(f"OpenAI API also failed: {str(openai_error)}, using mock data...")
+        if parsed_response is not None:
+            logger.info(f"Successfully parsed AI response with {len(parsed_response.get('arguments_for', []))} FOR and {len(parsed_response.get('arguments_against', []))} AGAINST arguments")
 
         # Final fallback to mock data
         if parsed_response is None:
+            logger.warning("AI providers unavailable, using mock data...")
             parsed_response = generate_mock_debate_arguments(request.topic)
 
         # Create the response
-        debate_response = DebateResponse(
-            topic=request.topic,
-            arguments_for=[Argument(**arg) for arg in parsed_response["arguments_for"]],
-            arguments_against=[Argument(**arg) for arg in parsed_response["arguments_against"]]
-        )
+        with trace_span("validate"):
+            debate_response = DebateResponse(
+                topic=request.topic,
+                arguments_for=[Argument(**arg) for arg in parsed_response["arguments_for"]],
+                arguments_against=[Argument(**arg) for arg in parsed_response["arguments_against"]]
+            )
 
         return debate_response
 
@@ -354,15 +918,84 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing"],
 )
 
+# Pending slow-request log writes, kept referenced until they finish
+slow_request_writes = set()
+
+async def record_slow_request(document: dict):
+    try:
+        await asyncio.wait_for(db.slow_requests.insert_one(document), SLOW_REQUEST_WRITE_TIMEOUT_S)
+    except Exception as e:
+        logger.warning(f"Failed to record slow request {document['request_id']}: {str(e) or type(e).__name__}")
+
+def schedule_slow_request_write(document: dict):
+    """Write a slow-request document in the background, dropping it if too many writes are pending"""
+    if len(slow_request_writes) >= SLOW_REQUEST_MAX_PENDING_WRITES:
+        logger.warning(f"Dropping slow request {document['request_id']}: {len(slow_request_writes)} writes already pending")
+        return
+    task = asyncio.create_task(record_slow_request(document))
+    slow_request_writes.add(task)
+    task.add_done_callback(slow_request_writes.discard)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Assign a request id, collect spans and report them via Server-Timing"""
+    request_id = request_id_from_header(request.headers.get('x-request-id'))
+    root = new_span("request")
+    id_token = current_request_id.set(request_id)
+    span_token = current_span.set(root)
+    try:
+        response = await call_next(request)
+    finally:
+        root["duration_ms"] = round((time.perf_counter() - root["start"]) * 1000, 2)
+        current_span.reset(span_token)
+        current_request_id.reset(id_token)
+
+    response.headers['X-Request-ID'] = request_id
+    response.headers['Server-Timing'] = server_timing_header(root)
+
+    if root["duration_ms"] >= SLOW_REQUEST_THRESHOLD_MS and random.random() < SLOW_REQUEST_SAMPLE_RATE:
+        logger.warning(f"Slow request {request_id}: {request.method} {request.url.path} took {root['duration_ms']}ms")
+        schedule_slow_request_write({
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration_ms": root["duration_ms"],
+            "timestamp": datetime.utcnow(),
+            "spans": span_tree(root, root["start"])
+        })
+
+    return response
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(RequestIdFilter())
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def bootstrap_database():
+    """Create the capped slow-request collection, then all declared indexes"""
+    try:
+        if "slow_requests" not in await db.list_collection_names():
+            await db.create_collection("slow_requests", capped=True, size=SLOW_REQUEST_COLLECTION_BYTES)
+        elif not (await db.slow_requests.options()).get("capped"):
+            logger.warning("slow_requests exists but is not capped and will grow without bound; convert it with convertToCapped")
+    except Exception as e:
+        logger.warning(f"Could not create slow_requests collection: {str(e)}")
+
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Could not create MongoDB indexes: {str(e)}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     mongo_client.close()
+    provider_executor.shutdown(wait=False, cancel_futures=True)
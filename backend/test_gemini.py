@@ -4,6 +4,7 @@
 import requests
 import json
 import sys
+import time
 
 
 def test_gemini_endpoint():
@@ -82,6 +83,44 @@ def test_debate_endpoint():
         print(f"❌ Request failed: {str(e)}")
 
 
+def test_progressive_debate_endpoint():
+    """Test two-phase debate generation (outline, then parallel fact expansion)"""
+    base_url = "http://localhost:8001/api"
+
+    test_data = {
+        "topic": "Should artificial intelligence be regulated by governments?",
+        "progressive": True
+    }
+
+    print("\nTesting progressive debate generation...")
+    print(f"Request: {json.dumps(test_data, indent=2)}")
+
+    try:
+        start = time.time()
+        response = requests.post(
+            f"{base_url}/generate-debate",
+            json=test_data,
+            timeout=60
+        )
+        elapsed = time.time() - start
+
+        print(f"Status Code: {response.status_code} ({elapsed:.2f}s)")
+
+        if response.status_code == 200:
+            result = response.json()
+            print("✅ Success!")
+            print(f"Arguments FOR: {len(result['arguments_for'])} arguments")
+            print(f"Arguments AGAINST: {len(result['arguments_against'])} arguments")
+            for arg in result['arguments_for'] + result['arguments_against']:
+                print(f"  - {arg['point']} ({len(arg['supporting_facts'])} facts)")
+        else:
+            print("❌ Error:")
+            print(response.text)
+
+    except Exception as e:
+        print(f"❌ Request failed: {str(e)}")
+
+
 def test_health_check():
     """Test basic health check"""
     base_url = "http://localhost:8001/api"
@@ -113,4 +152,7 @@ if __name__ == "__main__":
     # Test updated debate endpoint
     test_debate_endpoint()
 
+    # Test progressive debate generation
+    test_progressive_debate_endpoint()
+
     print("\n=== Tests completed ===")
\ No newline at end of file
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Check index bootstrap and that hot MongoDB queries are served by an index (no COLLSCAN)"""
+
+import asyncio
+import os
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure, ServerSelectionTimeoutError
+
+import server
+
+
+def winning_plans(explain):
+    """Yield every winningPlan in explain() output (finds and aggregation stages)"""
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                yield value
+            elif key != "rejectedPlans":
+                yield from winning_plans(value)
+    elif isinstance(explain, list):
+        for item in explain:
+            yield from winning_plans(item)
+
+
+def find_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from find_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from find_stages(item)
+
+
+def explain(db, query):
+    if "aggregate" in query:
+        return db.command("explain", {"aggregate": query["collection"], "pipeline": query["aggregate"], "cursor": {}})
+
+    cursor = db[query["collection"]].find(query["find"])
+    if query.get("sort"):
+        cursor = cursor.sort(query["sort"])
+    return cursor.explain()
+
+
+class FakeCollection:
+    """Just enough of a Motor collection for ensure_index"""
+
+    def __init__(self, name, existing=None, fail=None):
+        self.name = name
+        self.indexes = {"_id_": {"key": [("_id", 1)]}, **(existing or {})}
+        self.fail = fail
+
+    async def index_information(self):
+        return self.indexes
+
+    async def create_indexes(self, indexes):
+        for index in indexes:
+            if self.fail:
+                raise self.fail
+            spec = index.document
+            self.indexes[spec["name"]] = {"key": list(spec["key"].items()), **{k: v for k, v in spec.items() if k not in ("key", "name")}}
+
+
+class FakeDB:
+    def __init__(self, collections):
+        self.collections = collections
+        self.commands = []
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection(name))
+
+    async def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+
+
+def test_index_failure_does_not_stop_later_collections(monkeypatch):
+    failing = FakeCollection("status_checks", fail=OperationFailure("boom", code=67))
+    db = FakeDB({"status_checks": failing})
+    monkeypatch.setattr(server, "db", db)
+
+    failures = asyncio.run(server.ensure_indexes())
+
+    assert failures == [("status_checks", "timestamp_ttl")]
+    for name in ("status_rollups_minute", "status_rollups_hour"):
+        assert {"client_name_bucket_unique", "bucket_start_ttl"} <= set(db[name].indexes)
+
+
+def test_same_keys_under_another_name_is_reused_and_ttl_updated(monkeypatch):
+    existing = FakeCollection("status_checks", existing={
+        "timestamp_-1": {"key": [("timestamp", -1)], "expireAfterSeconds": 60},
+    })
+    db = FakeDB({"status_checks": existing})
+    monkeypatch.setattr(server, "db", db)
+
+    assert asyncio.run(server.ensure_indexes()) == []
+    assert "timestamp_ttl" not in existing.indexes
+    assert (("collMod", "status_checks"), {"index": {"name": "timestamp_-1", "expireAfterSeconds": server.STATUS_CHECK_TTL_SECONDS}}) in db.commands
+
+
+def test_same_keys_without_unique_is_reported(monkeypatch):
+    existing = FakeCollection("status_rollups_hour", existing={
+        "client_name_1_bucket_start_1": {"key": [("client_name", 1), ("bucket_start", 1)]},
+    })
+    monkeypatch.setattr(server, "db", FakeDB({"status_rollups_hour": existing}))
+
+    assert asyncio.run(server.ensure_indexes()) == [("status_rollups_hour", "client_name_bucket_unique")]
+
+
+def test_hot_queries_use_indexes():
+    """Bootstrap indexes, then explain each hot query and fail on a collection scan"""
+    client = MongoClient(os.environ['MONGO_URL'], serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except ServerSelectionTimeoutError:
+        client.close()
+        pytest.skip("MongoDB is not reachable")
+
+    db = client[os.environ['DB_NAME']]
+    try:
+        assert asyncio.run(server.ensure_indexes()) == []
+
+        for query in server.HOT_QUERIES:
+            stages = [stage for plan in winning_plans(explain(db, query)) for stage in find_stages(plan)]
+            print(f"{query['collection']} {query.get('find', query.get('aggregate'))} -> {stages}")
+            assert stages, f"No winning plan found for: {query}"
+            assert "COLLSCAN" not in stages, f"Hot query does a COLLSCAN: {query}"
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
+    print("✅ All hot queries use indexes")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Offline tests for debate generation (single-call and progressive) with stubbed providers"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import server
+
+OUTLINE = {
+    "arguments_for": ["For one", "For two", "For three"],
+    "arguments_against": ["Against one", "Against two"],
+}
+
+
+class StubGemini:
+    """Answer outline/expansion/single-call prompts from a reply function"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.models = self
+        self.calls = []
+
+    def generate_content(self, model, contents, config):
+        self.calls.append(contents)
+        text = self.reply(contents)
+        if isinstance(text, Exception):
+            raise text
+        return SimpleNamespace(text=text)
+
+
+def prompt_point(prompt):
+    """The argument point an expansion prompt asks about"""
+    return prompt.rsplit('topic:\n', 1)[1].split('"')[1]
+
+
+def facts_for(point):
+    return json.dumps({"supporting_facts": [f"{point} fact"]})
+
+
+def single_call_debate():
+    return json.dumps({
+        "arguments_for": [{"point": "Single for", "supporting_facts": ["a"]}],
+        "arguments_against": [{"point": "Single against", "supporting_facts": ["b"]}],
+    })
+
+
+@pytest.fixture
+def stub_gemini(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-placeholder-test')
+    monkeypatch.setattr(server, 'GEMINI_AVAILABLE', True)
+
+    def install(reply):
+        stub = StubGemini(reply)
+        monkeypatch.setattr(server, 'gemini_client', stub)
+        return stub
+
+    return install
+
+
+def route(expand, outline=json.dumps(OUTLINE), single=single_call_debate()):
+    def reply(prompt):
+        if 'Outline balanced debate arguments' in prompt:
+            return outline
+        if 'Provide 3 concise' in prompt:
+            return expand(prompt_point(prompt))
+        return single
+    return reply
+
+
+def generate(progressive=True):
+    request = server.DebateTopicRequest(topic="Test topic", progressive=progressive)
+    return asyncio.run(server.generate_debate_arguments(request))
+
+
+def test_merge_keeps_outline_order(stub_gemini):
+    # Earlier points finish last, so completion order is the reverse of outline order
+    delays = {point: 0.05 * (5 - i) for i, point in enumerate(OUTLINE["arguments_for"] + OUTLINE["arguments_against"])}
+
+    def expand(point):
+        time.sleep(delays[point])
+        return facts_for(point)
+
+    stub_gemini(route(expand))
+    response = generate()
+
+    assert [arg.point for arg in response.arguments_for] == OUTLINE["arguments_for"]
+    assert [arg.point for arg in response.arguments_against] == OUTLINE["arguments_against"]
+    for arg in response.arguments_for + response.arguments_against:
+        assert arg.supporting_facts == [f"{arg.point} fact"]
+
+
+def test_failed_expansion_is_retried(stub_gemini):
+    attempts = {}
+
+    def expand(point):
+        attempts[point] = attempts.get(point, 0) + 1
+        if point == "For two" and attempts[point] == 1:
+            return RuntimeError("429 Too Many Requests")
+        return facts_for(point)
+
+    stub_gemini(route(expand))
+    response = generate()
+
+    assert attempts["For two"] == 2
+    assert response.arguments_for[1].supporting_facts == ["For two fact"]
+
+
+@pytest.mark.parametrize("bad_reply", [
+    RuntimeError("429 Too Many Requests"),
+    "not json at all",
+    json.dumps(["a", "list", "instead"]),
+    json.dumps({"supporting_facts": []}),
+    json.dumps({"supporting_facts": [{"a": 1}, ["nested"], 3, ""]}),
+])
+def test_unrecoverable_expansion_falls_back_to_single_call(stub_gemini, bad_reply):
+    stub_gemini(route(lambda point: bad_reply if point == "Against two" else facts_for(point)))
+    response = generate()
+
+    assert [arg.point for arg in response.arguments_for] == ["Single for"]
+    assert [arg.point for arg in response.arguments_against] == ["Single against"]
+
+
+@pytest.mark.parametrize("outline", [
+    json.dumps({"arguments_for": [], "arguments_against": []}),
+    json.dumps({"arguments_for": ["Only one side"]}),
+    json.dumps(["not", "an", "object"]),
+    "garbage",
+])
+def test_empty_or_incomplete_outline_falls_back_to_single_call(stub_gemini, outline):
+    stub = stub_gemini(route(facts_for, outline=outline))
+    response = generate()
+
+    assert [arg.point for arg in response.arguments_for] == ["Single for"]
+    assert not any('Provide 3 concise' in prompt for prompt in stub.calls)
+
+
+def test_all_providers_failing_uses_mock_data(stub_gemini):
+    stub_gemini(lambda prompt: RuntimeError("provider down"))
+    response = generate()
+
+    mock = server.generate_mock_debate_arguments("Test topic")
+    assert [arg.point for arg in response.arguments_for] == [arg["point"] for arg in mock["arguments_for"]]
+
+
+@pytest.mark.parametrize("reply", [
+    "[1, 2]",
+    json.dumps({"arguments_for": "not a list", "arguments_against": []}),
+    json.dumps({"arguments_for": [1, 2], "arguments_against": []}),
+])
+def test_wrongly_shaped_single_call_reply_reaches_mock(stub_gemini, reply):
+    stub_gemini(lambda prompt: reply)
+    response = generate(progressive=False)
+
+    mock = server.generate_mock_debate_arguments("Test topic")
+    assert [arg.point for arg in response.arguments_for] == [arg["point"] for arg in mock["arguments_for"]]
+
+
+def test_wrongly_shaped_gemini_reply_falls_back_to_openai(stub_gemini, monkeypatch):
+    stub_gemini(lambda prompt: "[1, 2]")
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    openai_reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=single_call_debate()))])
+    monkeypatch.setattr(server, 'openai_client', SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: openai_reply))
+    ))
+
+    response = generate(progressive=False)
+
+    assert [arg.point for arg in response.arguments_for] == ["Single for"]
+
+
+def test_non_string_facts_are_dropped():
+    assert server.expansion_facts({"supporting_facts": ["Kept", {"a": 1}, ["x"], 7, "  "]}) == ["Kept"]
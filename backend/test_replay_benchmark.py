@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Offline smoke tests for provider record mode and the replay benchmark"""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+import replay_benchmark
+import server
+
+FIXTURE = Path(__file__).parent / "fixtures" / "provider_responses.jsonl"
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    """Install the replay stubs on the sample fixture, restoring the server afterwards"""
+    for name in ("DEBATE_RECORD_PATH", "GEMINI_AVAILABLE", "gemini_client", "openai_client", "generate_json"):
+        monkeypatch.setattr(server, name, getattr(server, name))
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-replay')
+    return replay_benchmark.install_stubs(replay_benchmark.load_fixture(FIXTURE))
+
+
+def test_fixture_has_every_kind():
+    records = replay_benchmark.load_fixture(FIXTURE)
+
+    assert {record["kind"] for record in records} == {"debate", "outline", "expand"}
+    assert {record["provider"] for record in records} == {"gemini", "openai"}
+
+
+@pytest.mark.parametrize("progressive, kinds", [
+    (False, {"debate"}),
+    (True, {"outline", "expand"}),
+])
+def test_replay_one_runs_each_mode(replay, progressive, kinds):
+    providers, outcomes = replay
+    topic = providers.pools["debate"][0]["topic"]
+
+    for _ in range(12):
+        stages, error = asyncio.run(replay_benchmark.replay_one(progressive, topic))
+        assert error is None
+        assert stages["handler"] > 0
+
+    used = {kind for kind, counts in outcomes.items() if counts["calls"]}
+    assert kinds <= used
+    # The sample fixture deliberately contains malformed replies of each kind
+    for kind in kinds:
+        assert 0 < outcomes[kind]["failures"] < outcomes[kind]["calls"]
+
+
+def test_recorded_replies_round_trip_through_load_fixture(tmp_path, monkeypatch):
+    path = tmp_path / "recorded.jsonl"
+    monkeypatch.setattr(server, "DEBATE_RECORD_PATH", str(path))
+
+    server.record_provider_response("gemini", "outline", "Topic", '{"arguments_for": [')
+    server.record_provider_response("openai", "debate", "Topic", None)
+
+    records = replay_benchmark.load_fixture(path)
+    assert [(r["provider"], r["kind"], r["topic"], r["raw"]) for r in records] == [
+        ("gemini", "outline", "Topic", '{"arguments_for": ['),
+        ("openai", "debate", "Topic", None),
+    ]
+    assert all(json.loads(line) for line in path.read_text().splitlines())
+
+
+def test_record_write_failure_is_not_raised(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DEBATE_RECORD_PATH", str(tmp_path / "missing" / "recorded.jsonl"))
+
+    server.record_provider_response("gemini", "debate", "Topic", "{}")
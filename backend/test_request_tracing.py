@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Offline tests for request tracing: request ids, Server-Timing and the slow-request log"""
+
+import asyncio
+import logging
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+def span(name, start, duration_ms, children=()):
+    return {"name": name, "start": start, "duration_ms": duration_ms, "children": list(children)}
+
+
+def metrics(header):
+    return {name: float(dur.split("=")[1]) for name, dur in (part.split(";") for part in header.split(", "))}
+
+
+def test_concurrent_spans_report_wall_clock_coverage():
+    # Three overlapping 200ms gemini calls, each under a parallel expansion
+    root = span("request", 0.0, 650.0, [
+        span("outline", 0.0, 200.0, [span("gemini", 0.0, 200.0)]),
+        *[span("expand", 0.2 + 0.05 * i, 200.0, [span("gemini", 0.2 + 0.05 * i, 200.0)]) for i in range(3)],
+    ])
+
+    timing = metrics(server.server_timing_header(root))
+
+    assert timing["expand"] == 300.0
+    assert timing["gemini"] == 500.0
+    assert timing["total"] == 650.0
+    assert all(duration <= timing["total"] for duration in timing.values())
+
+
+def test_disjoint_spans_are_summed():
+    root = span("request", 0.0, 100.0, [span("db", 0.0, 10.0), span("db", 0.05, 20.0)])
+
+    assert metrics(server.server_timing_header(root))["db"] == 30.0
+
+
+def test_nested_overlap_is_not_double_counted():
+    assert server.covered_ms([(0.0, 1.0), (0.2, 0.4), (0.9, 1.5)]) == 1500.0
+
+
+def test_well_formed_request_id_is_kept():
+    response = TestClient(server.app).get("/api/", headers={"X-Request-ID": "abc-123-DEF"})
+
+    assert response.headers["x-request-id"] == "abc-123-DEF"
+    assert "total;dur=" in response.headers["server-timing"]
+
+
+@pytest.mark.parametrize("request_id", [
+    "",
+    "a" * 65,
+    "has spaces",
+    "inject\nlog-line",
+    "<script>",
+    "id;with=separators",
+])
+def test_malformed_request_id_is_replaced(request_id):
+    assert server.request_id_from_header(request_id) != request_id
+    assert server.REQUEST_ID_PATTERN.fullmatch(server.request_id_from_header(request_id))
+
+
+def test_missing_request_id_is_generated():
+    response = TestClient(server.app).get("/api/")
+
+    assert server.REQUEST_ID_PATTERN.fullmatch(response.headers["x-request-id"])
+
+
+class SlowRequests:
+    """Fake slow_requests collection: records inserts, optionally never finishing them"""
+
+    def __init__(self, hang=False):
+        self.documents = []
+        self.hang = hang
+
+    async def insert_one(self, document):
+        if self.hang:
+            await asyncio.sleep(3600)
+        self.documents.append(document)
+
+
+class FakeDB:
+    def __init__(self, slow_requests, exists=True):
+        self.slow_requests = slow_requests
+        self.exists = exists
+
+    async def list_collection_names(self):
+        return ["slow_requests"] if self.exists else []
+
+    async def create_collection(self, name, **options):
+        self.created = (name, options)
+
+
+@pytest.fixture
+def slow_requests(monkeypatch):
+    collection = SlowRequests()
+    monkeypatch.setattr(server, "db", FakeDB(collection))
+    monkeypatch.setattr(server, "SLOW_REQUEST_SAMPLE_RATE", 1.0)
+    return collection
+
+
+def get_and_drain(path, headers=None):
+    """Issue a request through the ASGI app, then wait for background slow-request writes"""
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(path, headers=headers)
+        await asyncio.gather(*list(server.slow_request_writes))
+        return response
+    return asyncio.run(run())
+
+
+def test_slow_request_is_logged_with_span_tree(slow_requests, monkeypatch):
+    monkeypatch.setattr(server, "SLOW_REQUEST_THRESHOLD_MS", 0)
+
+    get_and_drain("/api/", headers={"X-Request-ID": "slow-1"})
+
+    [document] = slow_requests.documents
+    assert document["request_id"] == "slow-1"
+    assert document["path"] == "/api/"
+    assert document["status_code"] == 200
+    assert document["spans"]["name"] == "request"
+    assert document["spans"]["duration_ms"] == document["duration_ms"]
+
+
+def test_fast_request_is_not_logged(slow_requests, monkeypatch):
+    monkeypatch.setattr(server, "SLOW_REQUEST_THRESHOLD_MS", 60_000)
+
+    get_and_drain("/api/")
+
+    assert slow_requests.documents == []
+
+
+def test_unsampled_slow_request_is_not_logged(slow_requests, monkeypatch):
+    monkeypatch.setattr(server, "SLOW_REQUEST_THRESHOLD_MS", 0)
+    monkeypatch.setattr(server, "SLOW_REQUEST_SAMPLE_RATE", 0.0)
+
+    get_and_drain("/api/")
+
+    assert slow_requests.documents == []
+
+
+def test_pending_writes_are_capped_and_time_out(monkeypatch, caplog):
+    monkeypatch.setattr(server, "db", FakeDB(SlowRequests(hang=True)))
+    monkeypatch.setattr(server, "SLOW_REQUEST_MAX_PENDING_WRITES", 2)
+    monkeypatch.setattr(server, "SLOW_REQUEST_WRITE_TIMEOUT_S", 0.05)
+
+    async def run():
+        for i in range(3):
+            server.schedule_slow_request_write({"request_id": f"r{i}"})
+        assert len(server.slow_request_writes) == 2
+        await asyncio.gather(*list(server.slow_request_writes))
+        assert not server.slow_request_writes
+
+    with caplog.at_level(logging.WARNING, logger=server.__name__):
+        asyncio.run(run())
+
+    assert "Dropping slow request r2" in caplog.text
+    assert "Failed to record slow request r0: TimeoutError" in caplog.text
+
+
+def test_uncapped_slow_requests_collection_is_reported(monkeypatch, caplog):
+    class Collection(SlowRequests):
+        async def options(self):
+            return {}
+
+    monkeypatch.setattr(server, "db", FakeDB(Collection()))
+    monkeypatch.setattr(server, "ensure_indexes", lambda: asyncio.sleep(0))
+
+    with caplog.at_level(logging.WARNING, logger=server.__name__):
+        asyncio.run(server.bootstrap_database())
+
+    assert "slow_requests exists but is not capped" in caplog.text
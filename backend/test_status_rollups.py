@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Offline tests for status rollups: bucket alignment, window selection and ingest"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import server
+
+NOW = datetime(2026, 3, 14, 15, 9, 26, 535897)
+
+
+def test_bucket_starts_truncate_to_minute_and_hour():
+    starts = server.rollup_bucket_starts(NOW)
+
+    assert starts["minute"] == datetime(2026, 3, 14, 15, 9)
+    assert starts["hour"] == datetime(2026, 3, 14, 15, 0)
+
+
+def test_bucket_starts_on_boundary_are_unchanged():
+    boundary = datetime(2026, 3, 14, 15, 0)
+    starts = server.rollup_bucket_starts(boundary)
+
+    assert starts["minute"] == boundary
+    assert starts["hour"] == boundary
+
+
+def in_ranges(bucket_start, ranges):
+    return any(start <= bucket_start and (end is None or bucket_start < end) for start, end in ranges)
+
+
+def window_count(heartbeats, window_minutes, now):
+    """Count heartbeats the way the summary endpoints do, from minute and hour buckets"""
+    _, ranges = server.rollup_window_ranges(window_minutes, now)
+    return sum(
+        1 for timestamp in heartbeats
+        for granularity, bucket_start in server.rollup_bucket_starts(timestamp).items()
+        if in_ranges(bucket_start, ranges[granularity])
+    )
+
+
+def test_short_window_reads_only_minute_buckets():
+    since, ranges = server.rollup_window_ranges(60, NOW)
+
+    # Current minute plus the 59 before it
+    assert since == datetime(2026, 3, 14, 14, 10)
+    assert ranges == {"minute": [(since, None)], "hour": []}
+
+
+def test_one_minute_window_is_current_minute():
+    since, ranges = server.rollup_window_ranges(1, NOW)
+
+    assert since == datetime(2026, 3, 14, 15, 9)
+    assert ranges == {"minute": [(since, None)], "hour": []}
+
+
+def test_long_window_splits_into_partial_edges_and_whole_hours():
+    since, ranges = server.rollup_window_ranges(24 * 60, NOW)
+
+    assert since == datetime(2026, 3, 13, 15, 10)
+    assert ranges == {
+        "minute": [(since, datetime(2026, 3, 13, 16, 0)), (datetime(2026, 3, 14, 15, 0), None)],
+        "hour": [(datetime(2026, 3, 13, 16, 0), datetime(2026, 3, 14, 15, 0))],
+    }
+
+
+def test_hour_aligned_window_has_no_partial_first_hour():
+    now = datetime(2026, 3, 14, 15, 59, 30)
+    since, ranges = server.rollup_window_ranges(3 * 60, now)
+
+    assert since == datetime(2026, 3, 14, 13, 0)
+    assert ranges == {
+        "minute": [(datetime(2026, 3, 14, 15, 0), None)],
+        "hour": [(since, datetime(2026, 3, 14, 15, 0))],
+    }
+
+
+def test_at_most_120_minute_buckets_are_read():
+    next_minute = server.rollup_bucket_starts(NOW)["minute"] + timedelta(minutes=1)
+    for window_minutes in (1, 59, 60, 61, 119, 120, 121, 24 * 60, server.MAX_SUMMARY_WINDOW_MINUTES):
+        _, ranges = server.rollup_window_ranges(window_minutes, NOW)
+        minute_buckets = sum(((end or next_minute) - start) // timedelta(minutes=1) for start, end in ranges["minute"])
+        assert minute_buckets <= 120, window_minutes
+
+
+def test_window_counts_are_exact():
+    # One heartbeat every 7 minutes over three days
+    heartbeats = [NOW - timedelta(minutes=7 * i, seconds=13) for i in range(3 * 24 * 60 // 7)]
+
+    for window_minutes in (1, 5, 60, 61, 90, 180, 24 * 60, 2 * 24 * 60 + 17):
+        since, _ = server.rollup_window_ranges(window_minutes, NOW)
+        expected = sum(1 for timestamp in heartbeats if timestamp >= since)
+        assert window_count(heartbeats, window_minutes, NOW) == expected, window_minutes
+
+
+def test_max_window_stays_within_hour_ttl():
+    since, _ = server.rollup_window_ranges(server.MAX_SUMMARY_WINDOW_MINUTES, NOW)
+
+    assert (NOW - since).total_seconds() + server.STATUS_ROLLUP_TTL_MARGIN_SECONDS <= server.STATUS_ROLLUP_HOUR_TTL_SECONDS
+
+
+def test_range_match_uses_or_only_for_multiple_ranges():
+    start, end = datetime(2026, 3, 14, 14, 10), datetime(2026, 3, 14, 15, 0)
+
+    assert server.bucket_range_match([(start, None)]) == {"bucket_start": {"$gte": start}}
+    assert server.bucket_range_match([(start, end), (end, None)]) == {"$or": [
+        {"bucket_start": {"$gte": start, "$lt": end}},
+        {"bucket_start": {"$gte": end}},
+    ]}
+
+
+def test_rollup_failure_does_not_fail_ingest(monkeypatch):
+    class FailingCollection:
+        name = "status_rollups_minute"
+
+        async def update_one(self, *args, **kwargs):
+            raise RuntimeError("write conflict")
+
+    class Collection:
+        name = "status_rollups_hour"
+
+        def __init__(self):
+            self.updates = []
+
+        async def update_one(self, filter, update, upsert):
+            self.updates.append(filter)
+
+    class StatusChecks:
+        async def insert_one(self, document):
+            self.document = document
+
+    hour = Collection()
+    db = type("DB", (), {"status_checks": StatusChecks(), "status_rollups_minute": FailingCollection(), "status_rollups_hour": hour})()
+    monkeypatch.setattr(server, "db", db)
+
+    status = asyncio.run(server.create_status_check(server.StatusCheckCreate(client_name="probe")))
+
+    assert db.status_checks.document["id"] == status.id
+    assert hour.updates == [{"client_name": "probe", "bucket_start": server.rollup_bucket_starts(status.timestamp)["hour"]}]